@@ -1,12 +1,123 @@
 import sys
 import fitz  # PyMuPDF
+import numpy as np
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QFileDialog,
                              QScrollArea, QLabel, QToolBar, QMessageBox,
-                             QWidget, QVBoxLayout)
-from PyQt6.QtGui import (QPixmap, QImage, QAction, QColor, QPainter,
+                             QWidget)
+from PyQt6.QtGui import (QPixmap, QPixmapCache, QImage, QAction, QColor, QPainter,
                          QPen, QCursor) # Adicionado QPen, QCursor
-from PyQt6.QtCore import Qt, QEvent, QTimer, QRect # Adicionado QRect
+from PyQt6.QtCore import (Qt, QEvent, QTimer, QRect, QRectF, QObject, QRunnable,
+                          QThread, QThreadPool, pyqtSignal) # Adicionado QRect
 import os
+import threading
+from functools import partial
+from collections import OrderedDict
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; filters fall back to NumPy/MuPDF without it
+    njit = None
+
+
+# Night mode multiplies the page by an orange overlay (255, 140, 0) at alpha 80, which scales
+# each channel by (1 - a) + a * c / 255. MuPDF's tint keeps black and maps white to that color.
+NIGHT_TINT = 0xFFDBAF
+
+# The same tint as a gray level -> RGB table (MuPDF's fz_mul255 rounding), for grayscale pages
+_night_levels = np.arange(256)[:, None] * np.array([NIGHT_TINT >> 16, (NIGHT_TINT >> 8) & 0xFF, NIGHT_TINT & 0xFF]) + 128
+NIGHT_LUT = ((_night_levels + (_night_levels >> 8)) >> 8).astype(np.uint8)
+
+if njit is not None:
+    @njit(parallel=True, nogil=True, cache=True)
+    def tint_pixels(src, dst, r, g, b):
+        """Scales each channel of a flat RGB buffer by r/255, g/255, b/255 across all cores, without the GIL."""
+        for i in prange(src.shape[0] // 3):
+            j = 3 * i
+            for c in range(3):
+                k = r if c == 0 else (g if c == 1 else b)
+                # Same rounding as MuPDF's fz_mul255, so results match tint_with exactly
+                t = np.int32(src[j + c]) * k + 128
+                dst[j + c] = (t + (t >> 8)) >> 8
+else:
+    tint_pixels = None
+
+# Pages are stacked by hand rather than by a QVBoxLayout, whose sizes are capped at 524287 px
+# (a few hundred pages) and whose offsets can only be read back after a layout pass
+PAGE_SPACING = 20
+PAGE_MARGIN = 10
+
+# MuPDF documents are not thread-safe, so every worker thread keeps its own handle. QThreadPool
+# threads are not Python-created and lose a threading.local after each run(), so the handles
+# live in a dict keyed by thread id: thread id -> (open token, fitz.Document)
+_thread_docs = {}
+_thread_docs_lock = threading.Lock()
+
+
+def pixel_buffer(samples):
+    """Zero-copy view of a raster's bytes, whether it is held as a fitz.Pixmap or as plain bytes."""
+    return samples.samples_mv if isinstance(samples, fitz.Pixmap) else samples
+
+
+def get_thread_document(doc_path, doc_token):
+    """Returns the fitz.Document owned by the calling thread, reopening it for every file the user opens."""
+    # The token, not the path, tells opens apart: a PDF rebuilt in place keeps its path
+    ident = threading.get_ident()
+    with _thread_docs_lock:
+        entry = _thread_docs.get(ident)
+    if entry is not None and entry[0] == doc_token:
+        return entry[1]
+    if entry is not None:
+        entry[1].close()
+    doc = fitz.open(doc_path)
+    with _thread_docs_lock:
+        _thread_docs[ident] = (doc_token, doc)
+    return doc
+
+
+class RenderSignals(QObject):
+    # page_index, generation, zoom, samples (the fitz.Pixmap itself), width, height, stride,
+    # channels requested (an RGB request comes back gray when the page has no color)
+    finished = pyqtSignal(int, int, float, object, int, int, int, int)
+    # page_index, generation, zoom, channels requested: the task ended without a raster (stale or failed)
+    dropped = pyqtSignal(int, int, float, int)
+
+
+class PageRenderTask(QRunnable):
+    """Rasterizes ONE page on a worker thread and hands the raw bytes (RGB or gray) back to the GUI thread."""
+
+    def __init__(self, doc_path, doc_token, page_index, zoom, matrix, colorspace, check_gray, generation,
+                 signals, wanted):
+        super().__init__()
+        self.doc_path = doc_path
+        self.doc_token = doc_token  # Bumped on every open, so workers never reuse a handle to an older file
+        self.page_index = page_index
+        self.zoom = zoom
+        self.matrix = matrix  # fitz.Matrix(zoom, zoom), shared by every task at this zoom
+        self.colorspace = colorspace
+        self.check_gray = check_gray  # False once the page is known to have color
+        self.generation = generation
+        self.signals = signals
+        self.wanted = wanted  # wanted(page_index, generation): False once the request went stale
+
+    def run(self):
+        # Queued tasks for pages scrolled away (or re-zoomed) skip MuPDF entirely
+        if not self.wanted(self.page_index, self.generation):
+            self.signals.dropped.emit(self.page_index, self.generation, self.zoom, self.colorspace.n)
+            return
+        try:
+            page = get_thread_document(self.doc_path, self.doc_token).load_page(self.page_index)
+            pix = page.get_pixmap(matrix=self.matrix, colorspace=self.colorspace, alpha=False)
+        except Exception:
+            self.signals.dropped.emit(self.page_index, self.generation, self.zoom, self.colorspace.n)
+            return
+        if self.colorspace.n == 3 and self.check_gray:
+            # A page without color is kept at 1 byte/pixel instead of 3
+            rgb = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(-1, 3)
+            if np.array_equal(rgb[:, 0], rgb[:, 1]) and np.array_equal(rgb[:, 1], rgb[:, 2]):
+                pix = fitz.Pixmap(fitz.csGRAY, pix)
+        # The Pixmap travels as is: its samples_mv is read in place, where pix.samples would copy
+        self.signals.finished.emit(self.page_index, self.generation, self.zoom,
+                                   pix, pix.width, pix.height, pix.stride, self.colorspace.n)
 
 
 class PDFPageLabel(QLabel):
@@ -23,16 +134,29 @@ class PDFPageLabel(QLabel):
         # Dados de Texto
         self.words = []  # Lista de palavras [(x0, y0, x1, y1, text, ...)]
         self.words_loaded = False
+        self._wbox = None  # Caixas das palavras, array (N, 4) float32
+        self._wcen = None  # Centros das palavras, array (N, 2) float32
+        self._wtext = []  # Só o texto de cada palavra, para copiar fatias direto
+        self._line_h = 1.0  # Altura mediana das linhas (tamanho de cada faixa)
+        self._row_index = {}  # Faixa (linha) -> índices das palavras que a ocupam
+        self._rects = None  # Caixas já escaladas para o zoom atual: (x, y, w, h) int32
+        self._rects_zoom = None
 
         # Estado da Seleção e Cursor
         self.caret_index = -1  # Onde o cursor piscante está (índice da palavra)
         self.anchor_index = -1  # Onde a seleção começou (âncora)
 
-        # Controle do Piscar (Blink)
+        # Controle do Piscar (Blink) - o timer é único e fica na janela principal
         self.caret_visible = False
-        self.blink_timer = QTimer(self)
-        self.blink_timer.setInterval(500)  # Pisca a cada 500ms
-        self.blink_timer.timeout.connect(self.toggle_caret)
+
+        # Controle de Renderização (descarta resultados antigos vindos das threads)
+        self.render_generation = 0
+        self.pending = False  # Pedida a uma thread, resultado ainda não chegou
+        self.image_buffer = None  # Bytes por trás da imagem exibida (mantidos vivos)
+        self.raw_raster = None  # (zoom, samples, largura, altura, stride) sem filtro, para trocar de modo sem MuPDF
+        self.page_image = None  # QImage já filtrada, na resolução em que foi rasterizada
+        self.page_pixmap = None  # Página renderizada, desenhada pelo próprio paintEvent
+        self.pixmap_zoom = 1.0  # Zoom em que page_pixmap foi renderizada
 
     def load_words_if_needed(self):
         if self.words_loaded or not self.main_window.doc:
@@ -40,14 +164,65 @@ class PDFPageLabel(QLabel):
         try:
             page = self.main_window.doc.load_page(self.page_index)
             self.words = page.get_text("words")  # (x0, y0, x1, y1, text, ...)
+            # Versão vetorizada das caixas para o hit-test com NumPy
+            self._wbox = np.asarray([w[:4] for w in self.words], dtype=np.float32).reshape(-1, 4)
+            self._wcen = np.stack([(self._wbox[:, 0] + self._wbox[:, 2]) * 0.5,
+                                   (self._wbox[:, 1] + self._wbox[:, 3]) * 0.5], axis=1)
+            self._wtext = [w[4] for w in self.words]
+            self.build_row_index()
             self.words_loaded = True
         except Exception:
             pass
 
+    def build_row_index(self):
+        """Agrupa as palavras em faixas horizontais da altura de uma linha"""
+        box = self._wbox
+        heights = box[:, 3] - box[:, 1]
+        line_h = float(np.median(heights)) if len(box) else 0.0
+        self._line_h = line_h if line_h > 0 else 1.0
+
+        # Cada palavra entra em todas as faixas que ocupa (títulos grandes ocupam várias)
+        first_rows = (box[:, 1] // self._line_h).astype(np.int64).tolist()
+        last_rows = (box[:, 3] // self._line_h).astype(np.int64).tolist()
+        rows = {}
+        for i, (r0, r1) in enumerate(zip(first_rows, last_rows)):
+            for r in range(r0, r1 + 1):
+                rows.setdefault(r, []).append(i)
+        self._row_index = {r: np.asarray(ix, dtype=np.intp) for r, ix in rows.items()}
+
+    def set_page_pixmap(self, pixmap, pixmap_zoom=1.0):
+        """Troca a imagem da página (None volta ao placeholder)"""
+        self.page_pixmap = pixmap
+        self.pixmap_zoom = pixmap_zoom
+        self.update()
+
     def toggle_caret(self):
         """Faz o cursor aparecer/desaparecer"""
         self.caret_visible = not self.caret_visible
-        self.update()  # Redesenha para mostrar/esconder
+        # Redesenha só a faixa do cursor, não a página inteira
+        rect = self.caret_rect()
+        if rect is not None:
+            self.update(rect)
+        else:
+            self.update()
+
+    def scaled_word_rects(self):
+        """Caixas das palavras em pixels da widget, recalculadas só quando o zoom muda"""
+        zoom = self.main_window.zoom
+        if self._rects is None or self._rects_zoom != zoom:
+            box = self._wbox * zoom
+            self._rects = np.stack([box[:, 0], box[:, 1],
+                                    box[:, 2] - box[:, 0], box[:, 3] - box[:, 1]], axis=1).astype(np.int32)
+            self._rects_zoom = zoom
+        return self._rects
+
+    def caret_rect(self):
+        """Retângulo (em pixels da widget) ocupado pelo cursor piscante"""
+        if not 0 <= self.caret_index < len(self.words):
+            return None
+        cx, cy_top, _, height = self.scaled_word_rects()[self.caret_index].tolist()
+        # Folga de 2px para a espessura da caneta e as pontas da linha
+        return QRect(cx - 2, cy_top - 2, 5, height + 5)
 
     def get_word_index_at(self, pos):
         """Descobre qual palavra está mais próxima do clique"""
@@ -58,28 +233,29 @@ class PDFPageLabel(QLabel):
         zoom = self.main_window.zoom
         mx, my = pos.x() / zoom, pos.y() / zoom
 
-        # 1. Busca exata
-        for i, w in enumerate(self.words):
-            if w[0] <= mx <= w[2] and w[1] <= my <= w[3]:
-                return i
+        # Só olha as palavras da faixa do ponto e das vizinhas (acima e abaixo)
+        row = int(my // self._line_h)
+        bands = [self._row_index[r] for r in (row - 1, row, row + 1) if r in self._row_index]
+        if bands:
+            candidates = np.unique(np.concatenate(bands))  # Ordenado: mantém a primeira palavra
+        else:
+            candidates = np.arange(len(self._wbox))  # Longe de qualquer linha: busca em todas
+        box = self._wbox[candidates]
+
+        # 1. Busca exata (primeira palavra cuja caixa contém o ponto)
+        hit = (box[:, 0] <= mx) & (mx <= box[:, 2]) & (box[:, 1] <= my) & (my <= box[:, 3])
+        if hit.any():
+            return int(candidates[hit.argmax()])
 
         # 2. Busca por proximidade (para cliques nas margens ou entre linhas)
-        # Encontra a palavra com menor distância Manhattan
-        closest_idx = -1
-        min_dist = float('inf')
-
-        for i, w in enumerate(self.words):
-            # Centro da palavra
-            cx = (w[0] + w[2]) / 2
-            cy = (w[1] + w[3]) / 2
-            dist = abs(cx - mx) + abs(cy - my)
-            if dist < min_dist:
-                min_dist = dist
-                closest_idx = i
+        # Encontra a palavra com menor distância Manhattan até o centro
+        centers = self._wcen[candidates]
+        dist = np.abs(centers[:, 0] - mx) + np.abs(centers[:, 1] - my)
+        closest = int(dist.argmin())
 
         # Limite de distância (opcional, para não selecionar algo do outro lado da página)
-        if min_dist < 100:
-            return closest_idx
+        if dist[closest] < 100:
+            return int(candidates[closest])
         return -1
 
     def mousePressEvent(self, event):
@@ -98,7 +274,7 @@ class PDFPageLabel(QLabel):
                     self.caret_index = idx
 
                 self.caret_visible = True
-                self.blink_timer.start()
+                self.main_window.set_caret_blinker(self)
                 self.update()
 
     def mouseMoveEvent(self, event):
@@ -149,7 +325,7 @@ class PDFPageLabel(QLabel):
                 self.anchor_index = new_idx
 
             self.caret_visible = True
-            self.blink_timer.start()  # Reinicia timer para cursor não sumir enquanto digita
+            self.main_window.set_caret_blinker(self)  # Reinicia timer para cursor não sumir enquanto digita
             self.ensure_cursor_visible()
             self.update()
 
@@ -177,26 +353,46 @@ class PDFPageLabel(QLabel):
         start = min(self.anchor_index, self.caret_index)
         end = max(self.anchor_index, self.caret_index)
 
-        selected_words = self.words[start: end + 1]
-        text = " ".join([w[4] for w in selected_words])
+        text = " ".join(self._wtext[start: end + 1])
         QApplication.clipboard().setText(text)
         print("Copiado!")
 
     def focusOutEvent(self, event):
         """Para o pisca-pisca quando clica fora"""
-        self.blink_timer.stop()
+        if self.main_window.caret_blinker is self:
+            self.main_window.set_caret_blinker(None)
         self.caret_visible = False
         self.update()
 
     def paintEvent(self, event):
-        super().paintEvent(event)  # Desenha PDF
+        # O QLabel em si não tem nada a desenhar (sem texto nem pixmap próprios)
+        painter = QPainter(self)
+        # event.rect() é o retângulo sujo consolidado; region() seria mais exato,
+        # mas exigiria testar cada retângulo da região
+        dirty = event.rect()
+
+        # 0. Desenhar PDF: copia só o pedaço da página que cruza o retângulo sujo
+        if self.page_pixmap is not None:
+            # Pixels da imagem por pixel da widget (a razão de pixels da tela, fora da prévia do zoom)
+            scale = self.pixmap_zoom / self.main_window.zoom
+            if scale == 1.0:
+                painter.drawPixmap(dirty, self.page_pixmap, dirty)
+            else:
+                # Em HiDPI a imagem já está na resolução nativa: só suaviza quando é esticada
+                if abs(scale - self.page_pixmap.devicePixelRatio()) > 1e-6:
+                    painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+                source = QRectF(dirty.x() * scale, dirty.y() * scale,
+                                dirty.width() * scale, dirty.height() * scale)
+                painter.drawPixmap(QRectF(dirty), self.page_pixmap, source)
+        else:
+            # Placeholder: cor do modo atual e borda pintadas aqui, sem folha de estilo por label
+            painter.fillRect(dirty, self.main_window.placeholder_color)
+            painter.setPen(QColor("#333333"))
+            painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
 
         if not self.words or self.caret_index == -1:
             return
 
-        painter = QPainter(self)
-        zoom = self.main_window.zoom
-
         # 1. Desenhar Seleção (Highlight Azul)
         if self.anchor_index != self.caret_index and self.anchor_index != -1:
             start = min(self.anchor_index, self.caret_index)
@@ -205,20 +401,20 @@ class PDFPageLabel(QLabel):
             painter.setBrush(QColor(0, 120, 215, 80))  # Azul semi-transparente
             painter.setPen(Qt.PenStyle.NoPen)
 
-            for i in range(start, end + 1):
-                w = self.words[i]
-                rect = QRect(int(w[0] * zoom), int(w[1] * zoom), int((w[2] - w[0]) * zoom), int((w[3] - w[1]) * zoom))
-                painter.drawRect(rect)
+            # Só as caixas selecionadas que cruzam o retângulo sujo
+            rects = self.scaled_word_rects()[start:end + 1]
+            x, y, rw, rh = rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3]
+            in_dirty = ((x < dirty.x() + dirty.width()) & (x + rw > dirty.x()) &
+                        (y < dirty.y() + dirty.height()) & (y + rh > dirty.y()))
+            for rect in rects[in_dirty].tolist():
+                painter.drawRect(*rect)
 
         # 2. Desenhar Cursor Piscante (Caret)
-        if self.hasFocus() and self.caret_visible:
-            w = self.words[self.caret_index]
-
+        if self.hasFocus() and self.caret_visible and self.caret_rect().intersects(dirty):
             # Decide onde desenhar: esquerda da palavra (padrão) ou direita (se fim da seleção)
             # Para simplificar, desenhamos sempre à esquerda da palavra atual do caret_index
-            cx = int(w[0] * zoom)
-            cy_top = int(w[1] * zoom)
-            cy_bottom = int(w[3] * zoom)
+            cx, cy_top, _, height = self.scaled_word_rects()[self.caret_index].tolist()
+            cy_bottom = cy_top + height
 
             # Cor do cursor: Vermelho do tema ou Preto dependendo do fundo
             pen = QPen(QColor("#ff3333"))
@@ -235,9 +431,33 @@ class JustReadApp(QMainWindow):
 
         # State Variables
         self.doc = None
+        self.doc_path = None
+        self._doc_token = 0
+        self.page_sizes_pt = np.zeros((0, 2))  # (width, height) in points of every page (assumed equal to the first until measured)
+        self._measured_pages = set()  # Pages whose real rect has been read
+        self._gray_pages = set()  # Pages whose RGB raster came out colorless: rasterized 1 byte/pixel from then on
+        self._color_pages = set()  # Pages whose RGB raster had color: never checked again
         self.zoom = 1.0
         self.view_mode = "normal"
+        self.placeholder_color = QColor(self.get_placeholder_bg_color())  # Painted by PDFPageLabel itself
         self.page_labels = []
+        self._matrices = {}  # One fitz.Matrix per render zoom, kept across zoom changes
+        self._label_tops = None  # Label spans in container coordinates, computed by layout_pages
+        self._label_bots = None
+        self._label_sizes = []
+        self._rendered_indices = set()  # Pages requested or still holding an image, the only clear candidates
+
+        # LRU of raw (unfiltered) rasters: (page_index, zoom key) -> (samples, width, height, stride),
+        # samples being the worker's fitz.Pixmap (which owns the memory)
+        self.pix_cache_limit = 128 * 1024 * 1024  # bytes (a 2x A4 RGB raster is ~6 MB, a gray one ~2 MB)
+        self._pix_cache = OrderedDict()
+        self._pix_cache_bytes = 0
+        # Prefetched rasters wait here until first shown, so speculation never evicts real pages
+        self.prefetch_cache_limit = 16  # entries
+        self._prefetch_cache = OrderedDict()
+        # Finished pixmaps (filtered and scaled) per page, zoom and mode, so a page scrolled back
+        # into view or a mode toggled back skips the filter and the resample
+        QPixmapCache.setCacheLimit(128 * 1024)  # KB
 
         # Timer to prevent rendering while the user is still scrolling frantically
         self.scroll_timer = QTimer()
@@ -245,6 +465,45 @@ class JustReadApp(QMainWindow):
         self.scroll_timer.setInterval(50)  # Wait 50ms after stopping scroll
         self.scroll_timer.timeout.connect(self.update_page_visibility)
 
+        # Same idea for zoom: show a stretched preview at once, re-render when zooming stops
+        self.zoom_timer = QTimer()
+        self.zoom_timer.setSingleShot(True)
+        self.zoom_timer.setInterval(150)  # Wait 150ms after the last zoom step
+        self.zoom_timer.timeout.connect(self.apply_new_zoom)
+        # Zoom steps queued in the same event loop pass share one preview (one resize of every label)
+        self.preview_timer = QTimer()
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(0)
+        self.preview_timer.timeout.connect(self.preview_zoom)
+        self._wheel_zoom_delta = 0  # Ctrl+wheel angle not yet turned into a zoom step
+
+        # One caret blink timer for the whole window, driving only the focused page
+        self.caret_timer = QTimer(self)
+        self.caret_timer.setInterval(500)  # Blink every 500ms
+        self.caret_blinker = None
+
+        # Pages are rasterized on QThreadPool workers; results come back through this signal
+        self._render_generation = 0
+        self.render_signals = RenderSignals(self)
+        self.render_signals.finished.connect(self.on_page_rendered)
+
+        # Pages just outside the render band are prefetched into the cache on a
+        # separate, lower-priority pool so they never delay on-screen pages
+        self.prefetch_pool = QThreadPool(self)
+        self.prefetch_pool.setMaxThreadCount(max(1, (os.cpu_count() or 1) - 1))
+        self.prefetch_pool.setThreadPriority(QThread.Priority.LowPriority)
+        self.prefetch_signals = RenderSignals(self)
+        self.prefetch_signals.finished.connect(self.on_page_prefetched)
+        self.prefetch_signals.dropped.connect(self.on_prefetch_dropped)
+        self._prefetch_epoch = 0  # Bumped whenever queued prefetches become useless
+        self._prefetch_inflight = set()  # Cache keys queued or rasterizing on prefetch_pool
+        # The keys not started yet. Workers and render_single_page race to remove one (set.remove is
+        # atomic), so a queued prefetch is either run by its worker or taken over, never both
+        self._prefetch_queued = set()
+        self._prefetch_range = (0, 0)  # Pages the last visibility pass wanted prefetched
+        self._last_scroll_value = 0
+        self._scroll_direction = 1  # +1 reading down, -1 reading up; prefetch favors this side
+
         self.init_ui()
 
     def init_ui(self):
@@ -257,11 +516,9 @@ class JustReadApp(QMainWindow):
         self.scroll_bar = self.scroll_area.verticalScrollBar()
         self.scroll_bar.valueChanged.connect(self.on_scroll)
 
-        # Vertical Container
+        # Vertical Container (labels are placed by layout_pages)
         self.pages_container = QWidget()
-        self.pages_layout = QVBoxLayout(self.pages_container)
-        self.pages_layout.setSpacing(20)
-        self.pages_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.pages_container.installEventFilter(self)  # Re-centers pages when its width changes
 
         self.scroll_area.setWidget(self.pages_container)
         self.setCentralWidget(self.scroll_area)
@@ -304,63 +561,144 @@ class JustReadApp(QMainWindow):
         toolbar.addAction(btn_night)
 
     def eventFilter(self, source, event):
+        if source is self.pages_container and event.type() == QEvent.Type.Resize:
+            self.position_pages()
         if source == self.scroll_area.viewport() and event.type() == QEvent.Type.Wheel:
             modifiers = QApplication.keyboardModifiers()
             if modifiers == Qt.KeyboardModifier.ControlModifier:
                 delta = event.angleDelta().y()
-                if delta > 0:
+                if delta * self._wheel_zoom_delta < 0:
+                    self._wheel_zoom_delta = 0  # Direction changed: drop the partial notch
+                # Touchpads send many small deltas: zoom one step per full notch (120 units)
+                self._wheel_zoom_delta += delta
+                while self._wheel_zoom_delta >= 120:
+                    self._wheel_zoom_delta -= 120
                     self.zoom_in()
-                else:
+                while self._wheel_zoom_delta <= -120:
+                    self._wheel_zoom_delta += 120
                     self.zoom_out()
                 return True
         return super().eventFilter(source, event)
 
+    def set_caret_blinker(self, label):
+        """Points the shared caret timer at label (or stops it for None) and restarts the blink cycle."""
+        if label is not self.caret_blinker:
+            if self.caret_blinker is not None:
+                self.caret_timer.timeout.disconnect(self.caret_blinker.toggle_caret)
+            if label is not None:
+                self.caret_timer.timeout.connect(label.toggle_caret)
+            self.caret_blinker = label
+
+        if label is None:
+            self.caret_timer.stop()
+        else:
+            self.caret_timer.start()
+
     def open_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open PDF", "", "PDF Files (*.pdf)")
         if file_path:
             try:
                 self.doc = fitz.open(file_path)
+                self.doc_path = file_path
+                self._doc_token += 1
+                # Loading every page up front is slow on big files: assume they all match the
+                # first one and measure each page lazily when it is first rendered
+                first_rect = self.doc.load_page(0).rect if self.doc.page_count else fitz.Rect()
+                self.page_sizes_pt = np.tile([first_rect.width, first_rect.height], (self.doc.page_count, 1))
+                self._measured_pages = {0}
+                self._gray_pages = set()
+                self._color_pages = set()
                 self.zoom = 1.0
+                self._last_scroll_value, self._scroll_direction = 0, 1
+                self.cancel_prefetch()
+                self.clear_pix_cache()
                 self.setup_placeholders()  # Configures empty spaces
-                self.update_page_visibility()  # Renders only what is visible
+                # The scroll range follows the new container size on the next tick, so render then
+                self.scroll_timer.start()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error opening file:\n{e}")
 
     def setup_placeholders(self):
         """Creates empty labels with the exact size the page will have, without rendering the image."""
         # Clear previous layout
-        while self.pages_layout.count():
-            item = self.pages_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        self.set_caret_blinker(None)
+        for label in self.page_labels:
+            label.deleteLater()
         self.page_labels = []
+        self._label_tops = None
+        self._rendered_indices = set()
 
         if not self.doc:
+            self.pages_container.setMinimumSize(0, 0)
             return
 
-        for i, page in enumerate(self.doc):
-            # Calculate the size the page WOULD have if rendered
-            rect = page.rect  # Original size (points)
-            width = int(rect.width * self.zoom)
-            height = int(rect.height * self.zoom)
-
+        # Children of a hidden container are all shown (and polished) in a single pass when it is
+        # shown again, instead of one queued event per label
+        self.pages_container.hide()
+        for i in range(len(self.page_sizes_pt)):
             # --- ALTERAÇÃO AQUI ---
             # Antes: label = QLabel()
             # Agora passamos 'i' (índice) e 'self' (a janela principal)
             label = PDFPageLabel(i, self)
             # ----------------------
 
-            label.setFixedSize(width, height)
-            # Placeholder style (gray background while loading)
-            label.setStyleSheet(f"background-color: {self.get_placeholder_bg_color()}; border: 1px solid #333;")
+            label.setParent(self.pages_container)
+            # Placeholder (gray background while loading) is painted by the label itself
             label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
             # Store the page index in the object for later use
             # label.page_index = i  <-- Não precisa mais setar manualmente, já está no __init__ do PDFPageLabel
             label.is_rendered = False  # Flag for control
 
-            self.pages_layout.addWidget(label)
             self.page_labels.append(label)
+        # Give every placeholder the exact size the page will have, without rendering the image
+        self.layout_pages()
+        self.pages_container.show()
+
+    def layout_pages(self):
+        """Stacks the labels from the page sizes alone: offsets are plain arithmetic, no layout pass."""
+        sizes = self.page_pixel_sizes()
+        steps = sizes[:, 1] + PAGE_SPACING
+        self._label_tops = PAGE_MARGIN + np.cumsum(steps) - steps
+        self._label_bots = self._label_tops + sizes[:, 1]
+        self._label_sizes = sizes.tolist()
+        if self._label_sizes:
+            self.pages_container.setMinimumSize(int(sizes[:, 0].max()) + 2 * PAGE_MARGIN,
+                                                int(self._label_bots[-1]) + PAGE_MARGIN)
+        self.position_pages()
+
+    def position_pages(self):
+        """Moves the labels to their offsets, centered in the container's current width."""
+        if self._label_tops is None:
+            return
+        container_width = self.pages_container.width()
+        for label, top, (width, height) in zip(self.page_labels, self._label_tops.tolist(), self._label_sizes):
+            label.setGeometry(max(PAGE_MARGIN, (container_width - width) // 2), top, width, height)
+
+    def device_pixel_ratio(self):
+        return self.scroll_area.viewport().devicePixelRatioF()
+
+    def render_zoom(self):
+        """Zoom pages are rasterized at: the current zoom in device pixels, so rasters are shown 1:1."""
+        # On HiDPI screens MuPDF renders at native resolution instead of Qt upscaling afterwards.
+        # Zoom steps in between never reach MuPDF (paintEvent stretches the old pixmap until
+        # zoom_timer settles), and a fresh render is cheaper than resampling an old raster
+        return self.zoom * self.device_pixel_ratio()
+
+    def render_colorspace(self, page_index):
+        # Dark mode shows inverted luma, so it never needs color either
+        return fitz.csGRAY if self.view_mode == "dark" or page_index in self._gray_pages else fitz.csRGB
+
+    def render_matrix(self, render_zoom):
+        key = round(render_zoom * 100)
+        matrix = self._matrices.get(key)
+        if matrix is None:
+            matrix = self._matrices[key] = fitz.Matrix(render_zoom, render_zoom)
+        return matrix
+
+    def page_pixel_sizes(self):
+        """Size in pixels of every page at the current zoom, as an (N, 2) array (page_sizes_pt are in points)."""
+        return (self.page_sizes_pt * self.zoom).astype(np.int64)
 
     def on_scroll(self):
         # Uses a timer to avoid processing every single scrolled pixel (debounce)
@@ -377,57 +715,311 @@ class JustReadApp(QMainWindow):
         min_y = scroll_y - viewport_height  # Safety margin above
         max_y = scroll_y + (viewport_height * 2)  # Safety margin below
 
-        for label in self.page_labels:
-            # Y position of the label inside the container
-            label_y = label.y()
-            label_height = label.height()
-
-            # Check intersection: Is the label inside the visible area (with margin)?
-            is_visible = (label_y + label_height > min_y) and (label_y < max_y)
+        # Prefetch two viewports ahead of the render band but only one behind it
+        if scroll_y != self._last_scroll_value:
+            self._scroll_direction = 1 if scroll_y > self._last_scroll_value else -1
+        self._last_scroll_value = scroll_y
+        if self._scroll_direction > 0:
+            prefetch_min_y = scroll_y - (viewport_height * 2)
+            prefetch_max_y = scroll_y + (viewport_height * 4)
+        else:
+            prefetch_min_y = scroll_y - (viewport_height * 3)
+            prefetch_max_y = scroll_y + (viewport_height * 3)
+
+        # Labels are stacked top to bottom, so the ones intersecting a band form a contiguous
+        # slice: from the first whose bottom is below min_y to the last whose top is above max_y
+        lo = int(np.searchsorted(self._label_bots, min_y, side="right"))
+        hi = int(np.searchsorted(self._label_tops, max_y, side="left"))
+        prefetch_lo = int(np.searchsorted(self._label_bots, prefetch_min_y, side="right"))
+        prefetch_hi = int(np.searchsorted(self._label_tops, prefetch_max_y, side="left"))
+
+        # Only pages tracked as rendered can hold an image, so the rest of the document is never scanned
+        for i in [i for i in self._rendered_indices if not lo <= i < hi]:
+            self.clear_single_page(self.page_labels[i])
+
+        for label in self.page_labels[lo:hi]:
+            if not label.is_rendered:
+                self.render_single_page(label)
 
-            if is_visible:
-                if not label.is_rendered:
-                    self.render_single_page(label)
-            else:
-                if label.is_rendered:
-                    self.clear_single_page(label)
+        # Queued prefetches outside the new band are skipped by the workers, so forget them here
+        self._prefetch_range = (prefetch_lo, prefetch_hi)
+        self._prefetch_inflight = {key for key in self._prefetch_inflight if prefetch_lo <= key[0] < prefetch_hi}
+        # Nearest pages first; the side the user is heading to jumps the prefetch queue
+        ahead = self.page_labels[hi:prefetch_hi]
+        behind = self.page_labels[prefetch_lo:lo][::-1]
+        if self._scroll_direction < 0:
+            ahead, behind = behind, ahead
+        for label in ahead:
+            self.prefetch_page(label.page_index, priority=1)
+        for label in behind:
+            self.prefetch_page(label.page_index)
 
     def render_single_page(self, label):
-        """Renders and allocates memory for ONE page."""
-        idx = label.page_index
-        page = self.doc.load_page(idx)
-        matrix = fitz.Matrix(self.zoom, self.zoom)
-
-        # Heavy rendering happens here
-        pix = page.get_pixmap(matrix=matrix, alpha=False)
-        fmt = QImage.Format.Format_RGB888
-        img = QImage(pix.samples, pix.width, pix.height, pix.stride, fmt)
+        """Shows ONE page from the raster cache, or queues it for rasterization on the worker pool."""
+        # A new generation makes any result still in flight for this label stale
+        self._render_generation += 1
+        label.render_generation = self._render_generation
+        label.is_rendered = True
+        self._rendered_indices.add(label.page_index)
+        self.measure_page(label)
+
+        render_zoom = self.render_zoom()
+        colorspace = self.render_colorspace(label.page_index)
+        entry = self.get_cached_raster(label.page_index, render_zoom, colorspace.n)
+        if entry is not None:
+            label.pending = False
+            self.show_page_image(label, render_zoom, *entry)
+            return
 
-        img = self.apply_image_filter(img)
+        label.pending = True  # Requested, not shown yet
+        key = self.cache_key(label.page_index, render_zoom, colorspace.n)
+        if key in self._prefetch_inflight:
+            if not self.take_queued_prefetch(key):
+                return  # Already rasterizing on the prefetch pool: on_page_prefetched hands the result over
+            self._prefetch_inflight.discard(key)  # Still queued there: render it at viewport priority instead
+        task = PageRenderTask(self.doc_path, self._doc_token, label.page_index, render_zoom,
+                              self.render_matrix(render_zoom), colorspace,
+                              label.page_index not in self._color_pages, label.render_generation,
+                              self.render_signals, self.render_wanted)
+        QThreadPool.globalInstance().start(task)
+
+    def render_wanted(self, page_index, generation):
+        """Called on worker threads: is this render still the one the label waits for?"""
+        # Plain Python reads only, no Qt calls, so this is safe off the GUI thread
+        labels = self.page_labels
+        return page_index < len(labels) and labels[page_index].render_generation == generation
+
+    def prefetch_wanted(self, page_index, generation):
+        lo, hi = self._prefetch_range
+        return generation == self._prefetch_epoch and lo <= page_index < hi
+
+    def claim_prefetch(self, key, page_index, generation):
+        """Called on worker threads: starts a prefetch unless the viewport took it over or it went stale."""
+        return self.take_queued_prefetch(key) and self.prefetch_wanted(page_index, generation)
+
+    def take_queued_prefetch(self, key):
+        try:
+            self._prefetch_queued.remove(key)
+        except KeyError:
+            return False
+        return True
 
-        label.setPixmap(QPixmap.fromImage(img))
-        label.is_rendered = True
-        # Remove placeholder style
-        label.setStyleSheet("background-color: transparent;")
+    def measure_page(self, label):
+        """Reads the real size of a page the first time it is rendered and fixes its placeholder."""
+        idx = label.page_index
+        if idx in self._measured_pages:
+            return
+        self._measured_pages.add(idx)
+        rect = self.doc.load_page(idx).rect
+        if (rect.width, rect.height) != tuple(self.page_sizes_pt[idx]):
+            self.page_sizes_pt[idx] = rect.width, rect.height
+            # Pages below moved: restack them and re-check visibility on the next tick
+            self.layout_pages()
+            self.scroll_timer.start()
+
+    def on_page_rendered(self, page_index, generation, zoom, samples, width, height, stride, channels):
+        """Runs on the GUI thread: caches the worker's raw bytes and shows them on the label."""
+        if page_index >= len(self.page_labels):
+            return
+        label = self.page_labels[page_index]
+        if label.render_generation != generation:
+            return  # Page was scrolled away, re-zoomed or belongs to a previous document
+        self.note_page_color(page_index, channels, width, stride)
+        self.deliver_raster(label, zoom, samples, width, height, stride)
+
+    def deliver_raster(self, label, zoom, samples, width, height, stride):
+        """Caches the raster a pending label waited for and shows it."""
+        self.store_cached_raster(label.page_index, zoom, (samples, width, height, stride))
+        label.pending = False
+        self.show_page_image(label, zoom, samples, width, height, stride)
+        if stride // width < self.render_colorspace(label.page_index).n:
+            # Requested in dark mode, arrived after switching back: a stand-in until the RGB raster lands
+            self.render_single_page(label)
+
+    def prefetch_page(self, page_index, priority=0):
+        """Queues a low-priority render that only warms the prefetch cache."""
+        render_zoom = self.render_zoom()
+        colorspace = self.render_colorspace(page_index)
+        key = self.cache_key(page_index, render_zoom, colorspace.n)
+        if key in self._prefetch_inflight or key in self._pix_cache or key in self._prefetch_cache:
+            return
+        self._prefetch_inflight.add(key)
+        self._prefetch_queued.add(key)
+        task = PageRenderTask(self.doc_path, self._doc_token, page_index, render_zoom,
+                              self.render_matrix(render_zoom), colorspace,
+                              page_index not in self._color_pages, self._prefetch_epoch,
+                              self.prefetch_signals, partial(self.claim_prefetch, key))
+        self.prefetch_pool.start(task, priority)
+
+    def on_page_prefetched(self, page_index, generation, zoom, samples, width, height, stride, channels):
+        self._prefetch_inflight.discard(self.cache_key(page_index, zoom, channels))
+        if generation != self._prefetch_epoch:
+            return  # Queued before a zoom change or for a previous document
+        self.note_page_color(page_index, channels, width, stride)
+        label = self.page_labels[page_index]
+        if label.pending and round(zoom * 100) == round(self.render_zoom() * 100):
+            # Scrolled into view while this prefetch was running: render_single_page left it waiting here
+            self.deliver_raster(label, zoom, samples, width, height, stride)
+            return
+        self._prefetch_cache[self.cache_key(page_index, zoom, stride // width)] = (samples, width, height, stride)
+        while len(self._prefetch_cache) > self.prefetch_cache_limit:
+            self._prefetch_cache.popitem(last=False)
+
+    def on_prefetch_dropped(self, page_index, generation, zoom, channels):
+        key = self.cache_key(page_index, zoom, channels)
+        if generation != self._prefetch_epoch or key not in self._prefetch_inflight:
+            return  # Stale, or taken over by render_single_page, which already forgot the key
+        self._prefetch_inflight.discard(key)
+        label = self.page_labels[page_index]
+        if label.pending:
+            # The page was waiting for this prefetch, which failed: render it on the viewport pool
+            self.render_single_page(label)
+
+    def note_page_color(self, page_index, channels, width, stride):
+        """Remembers what an RGB render found, so each page is checked for color once."""
+        if channels != 3:
+            return
+        if stride // width == 1:
+            # The worker downconverted it: later renders of this page ask for gray directly
+            self._gray_pages.add(page_index)
+        else:
+            self._color_pages.add(page_index)
+
+    def cancel_prefetch(self):
+        self.prefetch_pool.clear()
+        self._prefetch_epoch += 1
+        self._prefetch_inflight.clear()
+        self._prefetch_queued.clear()
+
+    def show_page_image(self, label, raster_zoom, samples, width, height, stride):
+        """Filters a raw raster (rendered at raster_zoom) for the current view mode and puts it on the label."""
+        # The label keeps its own raw raster, so mode toggles survive LRU eviction
+        label.raw_raster = (raster_zoom, samples, width, height, stride)
+        label.image_buffer = None  # Filtered lazily, only if the finished pixmap is not cached
+        label.page_image = None
+        self.present_page_image(label)
+
+    def filter_page_image(self, label):
+        """Builds label.page_image: the raw raster filtered for the current view mode."""
+        raster_zoom, samples, width, height, stride = label.raw_raster
+        # MuPDF rows carry no padding, so the stride tells gray (1 byte/pixel) from RGB (3)
+        samples, channels = self.apply_image_filter(samples, width, height, stride // width)
+        fmt = QImage.Format.Format_Grayscale8 if channels == 1 else QImage.Format.Format_RGB888
+        # Keep the buffer (or the Pixmap owning it) the QImage wraps alive as long as the label shows it
+        label.image_buffer = samples
+        label.page_image = QImage(pixel_buffer(samples), width, height, width * channels, fmt)
+
+    def pixmap_cache_key(self, label, dpr):
+        raster_zoom, _, width, _, stride = label.raw_raster
+        # The raster's zoom and channel count too: a stand-in from another zoom, or a gray one in
+        # normal mode, must not shadow the native raster once it arrives
+        return (f"p{label.page_index}:{round(self.zoom * 100)}:{round(dpr * 100)}:{self.view_mode}"
+                f":{round(raster_zoom * 100)}:{stride // width}")
+
+    def present_page_image(self, label):
+        """Puts the finished pixmap on the label, from QPixmapCache or filtered and converted once."""
+        dpr = self.device_pixel_ratio()
+        key = self.pixmap_cache_key(label, dpr)
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            if label.page_image is None:
+                self.filter_page_image(label)
+            # The raster is already opaque: skip Qt's format conversion and alpha scan
+            flags = Qt.ImageConversionFlag.NoFormatConversion | Qt.ImageConversionFlag.NoOpaqueDetection
+            pixmap = QPixmap.fromImage(label.page_image, flags)
+            pixmap.setDevicePixelRatio(dpr)
+            raster_zoom = label.raw_raster[0]
+            if abs(raster_zoom - self.zoom * dpr) > 1e-6:
+                # A raster from before a zoom change (re-filtered by a mode toggle mid-zoom): paintEvent
+                # stretches it until the render at the new zoom lands, and it is never cached
+                label.set_page_pixmap(pixmap, raster_zoom)
+                label.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, False)
+                return
+            QPixmapCache.insert(key, pixmap)
+        label.set_page_pixmap(pixmap, self.zoom * dpr)
+        # The pixmap covers the whole label, so Qt can skip erasing the background first
+        label.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, True)
 
     def clear_single_page(self, label):
-        """Removes the image from RAM."""
-        label.setPixmap(QPixmap())  # Clears texture
+        """Removes the image from the label; the raw raster stays in the LRU cache."""
+        label.set_page_pixmap(None)  # Clears texture
         label.setText("")  # Removes text if any
+        label.image_buffer = None
+        label.raw_raster = None
+        label.page_image = None
+        label.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, False)
         label.is_rendered = False
-        # Reverts to placeholder background color
-        label.setStyleSheet(f"background-color: {self.get_placeholder_bg_color()}; border: 1px solid #333;")
-
-    def apply_image_filter(self, img):
+        label.pending = False
+        label.render_generation = 0  # Drops any render still in flight
+        self._rendered_indices.discard(label.page_index)
+
+    def cache_key(self, page_index, zoom, channels):
+        # 1.0 and 1.0000001 share an entry; gray (1) and RGB (3) rasters of a page do not
+        return page_index, round(zoom * 100), channels
+
+    def get_cached_raster(self, page_index, zoom, channels):
+        key = self.cache_key(page_index, zoom, channels)
+        entry = self._pix_cache.get(key)
+        if entry is not None:
+            self._pix_cache.move_to_end(key)
+            return entry
+        entry = self._prefetch_cache.pop(key, None)
+        if entry is not None:
+            # A prefetch that paid off: it now competes with the shown pages in the LRU
+            self.store_cached_raster(page_index, zoom, entry)
+        return entry
+
+    def store_cached_raster(self, page_index, zoom, entry):
+        _, width, height, stride = entry
+        key = self.cache_key(page_index, zoom, stride // width)
+        old = self._pix_cache.pop(key, None)
+        if old is not None:
+            self._pix_cache_bytes -= old[2] * old[3]
+        self._pix_cache[key] = entry
+        self._pix_cache_bytes += entry[2] * entry[3]  # height * stride bytes
+
+        # Evict least recently used rasters, always keeping the one just stored
+        while self._pix_cache_bytes > self.pix_cache_limit and len(self._pix_cache) > 1:
+            _, evicted = self._pix_cache.popitem(last=False)
+            self._pix_cache_bytes -= evicted[2] * evicted[3]
+
+    def clear_pix_cache(self):
+        QPixmapCache.clear()
+        self._pix_cache.clear()
+        self._pix_cache_bytes = 0
+        self._prefetch_cache.clear()
+
+    def apply_image_filter(self, samples, width, height, channels):
+        """Returns (samples, channels) filtered for the current view mode, never touching the input.
+
+        samples may be a fitz.Pixmap, in and out; its memory is read through pixel_buffer without a copy."""
         if self.view_mode == "dark":
-            img.invertPixels(QImage.InvertMode.InvertRgb)
-        elif self.view_mode == "night":
-            painter = QPainter(img)
-            overlay_color = QColor(255, 140, 0, 80)
-            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Multiply)
-            painter.fillRect(img.rect(), overlay_color)
-            painter.end()
-        return img
+            if channels == 3:
+                # An RGB raster kept from another mode: dark pages are inverted luma
+                if not isinstance(samples, fitz.Pixmap):
+                    samples = fitz.Pixmap(fitz.csRGB, width, height, samples, False)
+                samples = fitz.Pixmap(fitz.csGRAY, samples)
+            # One pass that copies and inverts at once (already a SIMD loop inside NumPy)
+            return np.bitwise_not(np.frombuffer(pixel_buffer(samples), dtype=np.uint8)), 1
+        if self.view_mode == "night" and channels == 1:
+            # A tinted gray page is one lookup from gray level to RGB
+            return NIGHT_LUT[np.frombuffer(pixel_buffer(samples), dtype=np.uint8)], 3
+        if self.view_mode == "night" and tint_pixels is not None:
+            # Parallel numba kernel when available
+            src = np.frombuffer(pixel_buffer(samples), dtype=np.uint8)
+            dst = np.empty_like(src)
+            tint_pixels(src, dst, NIGHT_TINT >> 16, (NIGHT_TINT >> 8) & 0xFF, NIGHT_TINT & 0xFF)
+            return dst, 3
+        if self.view_mode == "night":
+            # MuPDF tints the copy in a single C loop, no QPainter composition. Still about twice
+            # as fast as a NumPy lookup table, and handing back the Pixmap skips one more copy
+            if isinstance(samples, fitz.Pixmap):
+                pix = fitz.Pixmap(samples, 0)  # Copy without alpha
+            else:
+                pix = fitz.Pixmap(fitz.csRGB, width, height, samples, False)
+            pix.tint_with(0x000000, NIGHT_TINT)
+            return pix, 3
+        return samples, channels
 
     def get_placeholder_bg_color(self):
         if self.view_mode == "dark":
@@ -438,40 +1030,87 @@ class JustReadApp(QMainWindow):
 
     def change_mode(self, mode):
         self.view_mode = mode
-        # Force re-rendering of visible pages
-        for label in self.page_labels:
-            if label.is_rendered:
-                self.render_single_page(label)
-            else:
-                # Update placeholder color for non-rendered pages
-                label.setStyleSheet(f"background-color: {self.get_placeholder_bg_color()}; border: 1px solid #333;")
+        # Update placeholder color for non-rendered pages: no style resolution, just a repaint
+        self.placeholder_color = QColor(self.get_placeholder_bg_color())
+        self.pages_container.update()
+        # Re-filter the raw raster each shown page keeps, without MuPDF or the cache. Pending
+        # pages are filtered in the new mode when their raster arrives (and re-requested if it is gray)
+        for i in sorted(self._rendered_indices):
+            label = self.page_labels[i]
+            if label.raw_raster is not None:
+                self.show_page_image(label, *label.raw_raster)
+                _, _, width, _, stride = label.raw_raster
+                if stride // width < self.render_colorspace(i).n:
+                    # A gray raster from dark mode cannot show color: keep it until the RGB one arrives
+                    self.render_single_page(label)
 
     def zoom_in(self):
         self.zoom += 0.2
-        self.apply_new_zoom()
+        self.preview_timer.start()
 
     def zoom_out(self):
         if self.zoom > 0.4:
             self.zoom -= 0.2
-            self.apply_new_zoom()
+            self.preview_timer.start()
+
+    def preview_zoom(self):
+        """Stretches the pages already on screen to the new zoom and schedules the real re-render."""
+        if not self.doc:
+            return
+
+        self.layout_pages()
+        for label in self.page_labels:
+            if label.is_rendered:
+                if label.pending:
+                    # Still in flight at the old zoom: ask again at the new one
+                    self.render_single_page(label)
+                else:
+                    # paintEvent stretches the old raster to the new size; its edges may fall
+                    # a pixel short after rounding, so let Qt paint the background under it
+                    label.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, False)
+
+        # MuPDF only runs once the user stops zooming
+        self.zoom_timer.start()
 
     def apply_new_zoom(self):
         """When zooming, we need to resize placeholders and re-render what is visible."""
         if not self.doc:
             return
 
+        # Prefetches queued at the old zoom are no longer useful
+        self.cancel_prefetch()
+
         # 1. Update size of ALL placeholders (fast, geometry only)
+        render_zoom_key = round(self.render_zoom() * 100)
+        self.layout_pages()
         for label in self.page_labels:
-            page = self.doc.load_page(label.page_index)
-            rect = page.rect
-            width = int(rect.width * self.zoom)
-            height = int(rect.height * self.zoom)
-            label.setFixedSize(width, height)
+            # The old pixmap no longer covers the resized label, so let Qt paint the background again
+            label.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, False)
+            label._rects = None  # Scaled word boxes are rebuilt lazily at the new zoom
+            if label.raw_raster is not None and round(label.raw_raster[0] * 100) == render_zoom_key:
+                # Already rasterized at this zoom (zoomed back and forth): just present it again
+                self.present_page_image(label)
+                continue
             label.is_rendered = False  # Mark as dirty for re-rendering
+            label.pending = False
+            label.render_generation = 0  # Ignore renders still in flight at the old zoom
 
         # 2. Render only visible pages at new size
         self.update_page_visibility()
 
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # A taller viewport may reveal more pages
+        self.scroll_timer.start()
+
+    def closeEvent(self, event):
+        # Drop queued renders and let running workers finish before the window goes away
+        self.cancel_prefetch()
+        QThreadPool.globalInstance().clear()
+        self.prefetch_pool.waitForDone()
+        QThreadPool.globalInstance().waitForDone()
+        super().closeEvent(event)
+
 
 # --- Style Function ---
 def load_dark_red_style(app):